@@ -7,6 +7,12 @@ URLSpider 配置文件
 import re
 from typing import List, Pattern
 
+# 可选的RE2正则引擎（线性时间，无回溯）
+try:
+    import re2
+except ImportError:
+    re2 = None
+
 # 用户代理配置
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -76,6 +82,31 @@ URL_PATTERNS: List[Pattern] = [
     re.compile(r'["\'][./][^"\']+\.(?:js|css|png|jpg|jpeg|gif|svg|ico|php|asp|aspx|jsp|json|html|xml|txt|csv)[^"\']*["\']', re.IGNORECASE),
 ]
 
+
+# Perl字符类和单词边界（前面的反斜杠为偶数个，即未被转义）
+# RE2中它们只匹配ASCII字符，标准re中还匹配Unicode字符
+_PERL_CLASS_RE = re.compile(r'(?<!\\)(?:\\\\)*\\[bBdDsSwW]')
+
+
+def compile_fast(pattern: str, flags: int = 0) -> Pattern:
+    """
+    优先使用RE2编译正则，RE2不可用或不支持该语法/标志时回退到标准re
+    含Perl字符类或单词边界的模式固定使用标准re，保证匹配结果与是否安装RE2无关
+    :param pattern: 正则表达式
+    :param flags: re标志，RE2只支持IGNORECASE
+    :return: 编译后的正则
+    """
+    if re2 is not None and not flags & ~re.IGNORECASE and not _PERL_CLASS_RE.search(pattern):
+        options = re2.Options()
+        options.log_errors = False
+        options.case_sensitive = not flags & re.IGNORECASE
+        try:
+            return re2.compile(pattern, options)
+        except re2.error:
+            pass
+    return re.compile(pattern, flags)
+
+
 # 黑名单模式
 BLACKLIST_PATTERNS = [
     re.compile(r'^javascript:', re.IGNORECASE),
@@ -93,6 +124,13 @@ BLACKLIST_PATTERNS = [
     re.compile(r'^[\u4e00-\u9fa5]'),  # 以中文开头的字符串
 ]
 
+# 合并后的黑名单正则（一次匹配替代逐个模式检查）
+# 含 \u 转义及Unicode语义的 \d、\s（RE2不支持），固定使用标准re
+BLACKLIST_RE: Pattern = re.compile(
+    '|'.join(f'(?:{pattern.pattern})' for pattern in BLACKLIST_PATTERNS),
+    re.IGNORECASE
+)
+
 # 文件扩展名白名单
 ALLOWED_EXTENSIONS = {
     '.woff', '.woff2', '.ttf', '.eot'
@@ -4,11 +4,15 @@
 网页抓取模块
 """
 
+import asyncio
+import itertools
 import requests
 import time
 import random
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any, List, Set, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+import aiohttp
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 
@@ -16,6 +20,9 @@ from config import REQUEST_CONFIG
 from utils import generate_random_user_agent, print_error, print_warning, ProgressBar
 from extractor import URLExtractor
 
+# User-Agent池大小
+UA_POOL_SIZE = 32
+
 # 禁用SSL警告
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
@@ -54,15 +61,21 @@ class WebCrawler:
             'Upgrade-Insecure-Requests': '1',
         }
         
+        # 预生成User-Agent池，按请求序号轮换（首个请求使用配置的User-Agent）
+        self._ua_pool = [self.headers.get('User-Agent') or generate_random_user_agent()]
+        self._ua_pool += [generate_random_user_agent() for _ in range(UA_POOL_SIZE - 1)]
+        self._ua_counter = itertools.count()
+        
         # 配置Cookies
+        self.cookies = cookies or {}
         if cookies:
             self.session.cookies.update(cookies)
         
-        # 配置重试机制
+        # 配置重试机制和连接池（连接池大小随并发数增长，避免连接池成为瓶颈）
         adapter = HTTPAdapter(
             max_retries=self.max_retries,
             pool_connections=10,
-            pool_maxsize=10
+            pool_maxsize=max(10, self.max_workers * 4)
         )
         self.session.mount('http://', adapter)
         self.session.mount('https://', adapter)
@@ -72,11 +85,42 @@ class WebCrawler:
         
         # 提取器
         self.extractor = None
+        
+        # 每个主机下一次允许请求的时间点（time.monotonic）
+        self._host_buckets: Dict[str, float] = {}
+        
+        # 异步会话（仅在异步爬取期间存在）及其使用者计数
+        self._async_session: Optional[aiohttp.ClientSession] = None
+        self._async_session_users = 0
     
     def set_extractor(self, extractor: URLExtractor):
         """设置URL提取器"""
         self.extractor = extractor
     
+    def _next_headers(self) -> Dict[str, str]:
+        """生成本次请求的请求头（从User-Agent池中轮换）"""
+        user_agent = self._ua_pool[next(self._ua_counter) % UA_POOL_SIZE]
+        return {**self.headers, 'User-Agent': user_agent}
+    
+    def _host_delay(self, url: str) -> float:
+        """
+        为目标主机预约下一个请求时间片，返回需要等待的秒数
+        不同主机之间互不阻塞
+        """
+        host = urlparse(url).netloc
+        now = time.monotonic()
+        ready_at = max(now, self._host_buckets.get(host, 0.0))
+        self._host_buckets[host] = ready_at + random.uniform(0.1, 0.5)
+        return ready_at - now
+    
+    @staticmethod
+    def _decode_body(body: bytes, charset: Optional[str] = None) -> str:
+        """按服务器声明的编码解码响应体，未声明或编码未知时使用UTF-8"""
+        try:
+            return body.decode(charset or 'utf-8', errors='ignore')
+        except LookupError:
+            return body.decode('utf-8', errors='ignore')
+    
     def fetch(self, url: str, method: str = 'GET', **kwargs) -> Optional[str]:
         """
         获取网页内容
@@ -85,18 +129,28 @@ class WebCrawler:
         :param kwargs: 其他请求参数
         :return: 网页内容或None
         """
+        result = self._fetch_typed(url, method, **kwargs)
+        return result[0] if result else None
+    
+    def _fetch_typed(self, url: str, method: str = 'GET', **kwargs) -> Optional[Tuple[str, str]]:
+        """
+        获取网页内容及其Content-Type
+        :return: (网页内容, Content-Type) 或 None
+        """
         if url in self.visited_urls:
             return None
         
         try:
-            # 随机延迟，避免被封
-            time.sleep(random.uniform(0.1, 0.5))
+            # 同一主机的请求间隔随机延迟，避免被封
+            delay = self._host_delay(url)
+            if delay > 0:
+                time.sleep(delay)
             
             # 发送请求
             response = self.session.request(
                 method=method,
                 url=url,
-                headers=self.headers,
+                headers=self._next_headers(),
                 timeout=self.timeout,
                 verify=False,
                 allow_redirects=True,
@@ -105,14 +159,13 @@ class WebCrawler:
             
             response.raise_for_status()
             
-            # 更新User-Agent
-            self.headers['User-Agent'] = generate_random_user_agent()
-            
             # 缓存访问过的URL
             self.visited_urls.add(url)
             
-            # 返回内容
-            return response.content.decode('utf-8', errors='ignore')
+            # 返回内容（仅在服务器显式声明 charset 时采用其编码）
+            content_type = response.headers.get('Content-Type', '').lower()
+            charset = response.encoding if 'charset=' in content_type else None
+            return self._decode_body(response.content, charset), content_type
             
         except requests.exceptions.Timeout:
             print_error(f"Timeout fetching {url}")
@@ -127,6 +180,107 @@ class WebCrawler:
         
         return None
     
+    @asynccontextmanager
+    async def _async_session_scope(self):
+        """打开异步会话（已存在时直接复用，最后一个使用者退出时关闭）"""
+        if self._async_session is None:
+            connector = aiohttp.TCPConnector(limit=200, ssl=False)
+            self._async_session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                cookies=self.cookies
+            )
+        
+        session = self._async_session
+        self._async_session_users += 1
+        try:
+            yield session
+        finally:
+            self._async_session_users -= 1
+            if self._async_session_users == 0:
+                self._async_session = None
+                await session.close()
+    
+    async def fetch_async(self, url: str, method: str = 'GET', **kwargs) -> Optional[str]:
+        """
+        异步获取网页内容
+        :param url: 目标URL
+        :param method: HTTP方法
+        :param kwargs: 其他请求参数
+        :return: 网页内容或None
+        """
+        result = await self._fetch_typed_async(url, method, **kwargs)
+        return result[0] if result else None
+    
+    async def _fetch_typed_async(self, url: str, method: str = 'GET', **kwargs) -> Optional[Tuple[str, str]]:
+        """
+        异步获取网页内容及其Content-Type
+        :return: (网页内容, Content-Type) 或 None
+        """
+        if url in self.visited_urls:
+            return None
+        
+        async with self._async_session_scope() as session:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    # 同一主机的请求间隔随机延迟，避免被封
+                    delay = self._host_delay(url)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    
+                    # 发送请求
+                    async with session.request(
+                        method,
+                        url,
+                        headers=self._next_headers(),
+                        allow_redirects=True,
+                        **kwargs
+                    ) as response:
+                        response.raise_for_status()
+                        body = await response.read()
+                        charset = response.charset
+                        content_type = response.headers.get('Content-Type', '').lower()
+                    
+                    # 缓存访问过的URL
+                    self.visited_urls.add(url)
+                    
+                    # 返回内容
+                    return self._decode_body(body, charset), content_type
+                
+                except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+                    # 超时和连接错误可重试
+                    if attempt < self.max_retries:
+                        await asyncio.sleep(REQUEST_CONFIG['retry_delay'])
+                        continue
+                    if isinstance(e, asyncio.TimeoutError):
+                        print_error(f"Timeout fetching {url}")
+                    else:
+                        print_error(f"Connection error fetching {url}")
+                except aiohttp.ClientResponseError as e:
+                    print_error(f"HTTP error fetching {url}: {e.status} {e.message}")
+                except aiohttp.ClientError as e:
+                    print_error(f"Error fetching {url}: {e}")
+                except Exception as e:
+                    print_error(f"Unexpected error fetching {url}: {e}")
+                
+                break
+        
+        return None
+    
+    def _extract_by_type(self, url: str, content: str, content_type: str) -> List[str]:
+        """
+        根据Content-Type选择提取方式，非HTML内容跳过HTML解析
+        :param url: 页面URL
+        :param content: 页面内容
+        :param content_type: 响应的Content-Type（小写）
+        :return: 提取到的URL列表
+        """
+        if 'javascript' in content_type or urlparse(url).path.endswith('.js'):
+            return self.extractor.extract_from_js(content, url)
+        if 'json' in content_type:
+            return self.extractor.extract_from_json(content, url)
+        return self.extractor.extract_from_html(content, url)
+    
     def crawl_page(self, url: str, extract_js: bool = False) -> Tuple[List[str], List[str]]:
         """
         爬取单个页面并提取URL
@@ -141,12 +295,12 @@ class WebCrawler:
         print(f"\nCrawling: {url}")
         
         # 获取页面内容
-        content = self.fetch(url)
-        if not content:
+        result = self._fetch_typed(url)
+        if not result or not result[0]:
             return [], []
         
-        # 提取URL
-        page_urls = self.extractor.extract_from_html(content, url)
+        # 按内容类型提取URL
+        page_urls = self._extract_by_type(url, *result)
         
         # 如果启用了JS提取，也爬取JS文件
         if extract_js:
@@ -159,13 +313,60 @@ class WebCrawler:
         
         return page_urls, []
     
+    async def crawl_page_async(self, url: str, extract_js: bool = False) -> Tuple[List[str], List[str]]:
+        """
+        异步爬取单个页面并提取URL
+        :param url: 目标URL
+        :param extract_js: 是否专门提取JS文件中的URL
+        :return: (页面URL列表, 子域名列表)
+        """
+        if not self.extractor:
+            print_error("Extractor not set!")
+            return [], []
+        
+        print(f"\nCrawling: {url}")
+        
+        # 获取页面内容
+        result = await self._fetch_typed_async(url)
+        if not result or not result[0]:
+            return [], []
+        
+        # 按内容类型提取URL
+        page_urls = self._extract_by_type(url, *result)
+        
+        # 如果启用了JS提取，并发爬取JS文件
+        if extract_js:
+            js_urls = [url for url in page_urls if url.endswith('.js')][:5]  # 限制JS文件数量
+            js_contents = await asyncio.gather(*(self.fetch_async(js_url) for js_url in js_urls))
+            for js_url, js_content in zip(js_urls, js_contents):
+                if js_content:
+                    js_extracted = self.extractor.extract_from_js(js_content, js_url)
+                    page_urls.extend(js_extracted)
+        
+        return page_urls, []
+    
     def crawl_deep(self, 
                    start_url: str, 
                    max_depth: int = None,
                    max_pages: int = 100,
                    extract_js: bool = False) -> Tuple[List[str], List[str]]:
         """
-        深度爬取
+        深度爬取（同步封装）
+        :param start_url: 起始URL
+        :param max_depth: 最大爬取深度
+        :param max_pages: 最大页面数
+        :param extract_js: 是否提取JS文件
+        :return: (URL列表, 子域名列表)
+        """
+        return asyncio.run(self.crawl_deep_async(start_url, max_depth, max_pages, extract_js))
+    
+    async def crawl_deep_async(self, 
+                               start_url: str, 
+                               max_depth: int = None,
+                               max_pages: int = 100,
+                               extract_js: bool = False) -> Tuple[List[str], List[str]]:
+        """
+        异步深度爬取
         :param start_url: 起始URL
         :param max_depth: 最大爬取深度
         :param max_pages: 最大页面数
@@ -181,39 +382,50 @@ class WebCrawler:
         all_urls = set()
         all_subdomains = set()
         
-        # 待爬取队列: (url, depth)
-        queue = [(start_url, 0)]
+        # 按层广度优先：每层先按顺序占用页面配额，再在层内并发爬取
+        level = [start_url]
+        scheduled = {start_url}
         processed = 0
         
         print(f"\nStarting deep crawl from {start_url}")
         print(f"Max depth: {max_depth}, Max pages: {max_pages}")
         
-        with ProgressBar(max_pages, "Crawling pages") as progress:
-            while queue and processed < max_pages:
-                current_url, depth = queue.pop(0)
-                
-                # 检查是否已访问
-                if current_url in self.visited_urls:
-                    continue
-                
-                # 爬取页面
-                page_urls, _ = self.crawl_page(current_url, extract_js)
-                
-                # 添加到结果
-                all_urls.update(page_urls)
-                
-                # 如果未达到最大深度，将新URL加入队列
-                if depth < max_depth:
-                    for new_url in page_urls:
+        semaphore = asyncio.Semaphore(self.max_workers)
+        
+        async def crawl_one(url: str) -> List[str]:
+            async with semaphore:
+                try:
+                    page_urls, _ = await self.crawl_page_async(url, extract_js)
+                    return page_urls
+                except Exception as e:
+                    print_error(f"Error processing {url}: {e}")
+                    return []
+        
+        async with self._async_session_scope():
+            with ProgressBar(max_pages, "Crawling pages") as progress:
+                depth = 0
+                while level and processed < max_pages:
+                    # 按广度优先顺序占用配额，已访问的页面不计入
+                    batch = [url for url in level if url not in self.visited_urls][:max_pages - processed]
+                    processed += len(batch)
+                    
+                    results = await asyncio.gather(*(crawl_one(url) for url in batch))
+                    
+                    # 汇总本层结果；下一层按URL排序，保证相同站点的爬取结果可复现
+                    next_urls = set()
+                    for page_urls in results:
+                        all_urls.update(page_urls)
+                        progress.update(1)
+                        if depth < max_depth:
+                            next_urls.update(page_urls)
+                    
+                    level = []
+                    for new_url in sorted(next_urls - scheduled):
                         # 只添加同域名的页面链接
                         if self.extractor.filter.filter(new_url):
-                            queue.append((new_url, depth + 1))
-                
-                processed += 1
-                progress.update(1)
-                
-                # 随机延迟
-                time.sleep(random.uniform(0.2, 1.0))
+                            scheduled.add(new_url)
+                            level.append(new_url)
+                    depth += 1
         
         print(f"\nCrawled {processed} pages, found {len(all_urls)} URLs")
         
@@ -230,7 +442,20 @@ class WebCrawler:
                     extract_js: bool = False,
                     show_progress: bool = True) -> Tuple[List[str], List[str]]:
         """
-        批量爬取URL
+        批量爬取URL（同步封装）
+        :param urls: URL列表
+        :param extract_js: 是否提取JS文件
+        :param show_progress: 是否显示进度条
+        :return: (URL列表, 子域名列表)
+        """
+        return asyncio.run(self.crawl_batch_async(urls, extract_js, show_progress))
+    
+    async def crawl_batch_async(self, 
+                                urls: List[str], 
+                                extract_js: bool = False,
+                                show_progress: bool = True) -> Tuple[List[str], List[str]]:
+        """
+        异步批量爬取URL
         :param urls: URL列表
         :param extract_js: 是否提取JS文件
         :param show_progress: 是否显示进度条
@@ -243,37 +468,29 @@ class WebCrawler:
         all_urls = set()
         all_subdomains = set()
         
-        def process_url(url):
-            try:
-                page_urls, _ = self.crawl_page(url, extract_js)
-                return page_urls
-            except Exception as e:
-                print_error(f"Error processing {url}: {e}")
-                return []
+        # 使用信号量限制并发数
+        semaphore = asyncio.Semaphore(self.max_workers)
+        
+        async def process_url(url):
+            async with semaphore:
+                try:
+                    page_urls, _ = await self.crawl_page_async(url, extract_js)
+                    return page_urls
+                except Exception as e:
+                    print_error(f"Error processing {url}: {e}")
+                    return []
         
-        # 使用线程池并发处理
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+        async with self._async_session_scope():
+            tasks = [asyncio.create_task(process_url(url)) for url in urls]
+            
             if show_progress:
                 with ProgressBar(len(urls), "Processing URLs") as progress:
-                    futures = {executor.submit(process_url, url): url for url in urls}
-                    
-                    for future in as_completed(futures):
-                        try:
-                            page_urls = future.result()
-                            all_urls.update(page_urls)
-                        except Exception as e:
-                            url = futures[future]
-                            print_error(f"Error processing {url}: {e}")
-                        
+                    for future in asyncio.as_completed(tasks):
+                        all_urls.update(await future)
                         progress.update(1)
             else:
-                futures = [executor.submit(process_url, url) for url in urls]
-                for future in as_completed(futures):
-                    try:
-                        page_urls = future.result()
-                        all_urls.update(page_urls)
-                    except Exception as e:
-                        print_error(f"Error in thread: {e}")
+                for page_urls in await asyncio.gather(*tasks):
+                    all_urls.update(page_urls)
         
         return list(all_urls), list(all_subdomains)
     
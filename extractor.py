@@ -5,15 +5,72 @@ URL提取模块
 """
 
 import re
+import json
+import functools
 from typing import List, Set, Tuple, Optional, Dict, Any
 from urllib.parse import urlparse
 from bs4 import BeautifulSoup
-import tldextract
+
+# 优先使用 lxml 解析器（C实现，比 html.parser 快数倍）
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
 
 from config import URL_PATTERNS
-from utils import URLNormalizer, print_info, print_warning
+from utils import URLNormalizer, TLD_EXTRACT, print_info, print_warning
 from filter import URLFilter
 
+# CSS url(...) 背景图
+_BG_RE = re.compile(r'url\s*\(\s*["\']?([^"\')]+)["\']?\s*\)', re.IGNORECASE)
+
+# 需要提取URL的标签及其属性（link 包括 CSS 和 favicon）
+_TAG_ATTRS = {
+    'a': ('href',),
+    'img': ('src', 'data-src'),
+    'script': ('src',),
+    'iframe': ('src',),
+    'form': ('action',),
+    'embed': ('src',),
+    'source': ('src',),
+    'track': ('src',),
+    'area': ('href',),
+    'base': ('href',),
+    'meta': ('content', 'url'),
+    'link': ('href',),
+}
+
+# JSON数据中的URL
+_JSON_URL_RE = re.compile(r'"url"\s*:\s*["\']([^"\']+)["\']', re.IGNORECASE)
+
+# 变量中的URL
+_VAR_RE = re.compile(r'(?:const|let|var)\s+[a-zA-Z_$][a-zA-Z0-9_$]*\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+
+# JS文件特定格式的URL
+_JS_SPECIFIC_PATTERNS = [
+    # Webpack模块
+    re.compile(r'__webpack_require__\(\s*["\']([^"\']+)["\']', re.IGNORECASE),
+    # import/export语句
+    re.compile(r'(?:import|export|from|require)\s*["\']([^"\']+)["\']', re.IGNORECASE),
+    # 模板字符串中的URL
+    re.compile(r'`([^`]+\.(?:js|css|png|jpg|jpeg|gif|svg))`', re.IGNORECASE),
+]
+
+
+def _favicon_for(base_url: str) -> Optional[str]:
+    """获取站点默认 favicon.ico 地址"""
+    parsed = urlparse(base_url)
+    if parsed.scheme and parsed.netloc:
+        return f"{parsed.scheme}://{parsed.netloc}/favicon.ico"
+    return None
+
+
+@functools.lru_cache(maxsize=8192)
+def _tldx(netloc: str):
+    """TLD_EXTRACT 的缓存版本（同一域名在爬取中会反复出现）"""
+    return TLD_EXTRACT(netloc)
+
 
 class URLExtractor:
     """URL提取器"""
@@ -29,6 +86,17 @@ class URLExtractor:
         
         # 缓存已提取的URL，避免重复
         self._extracted_cache: Set[str] = set()
+        
+        # 已处理内容的指纹：hash((内容哈希, 去掉查询参数的base_url))
+        self._seen_contents: Set[int] = set()
+    
+    def set_domain(self, domain: Optional[str]):
+        """
+        切换目标域名（同时更新过滤器），保留已提取URL的缓存
+        :param domain: 新的目标域名
+        """
+        self.domain = domain
+        self.filter.set_domain(domain)
     
     def extract_from_html(self, html_content: str, base_url: str = None) -> List[str]:
         """
@@ -37,6 +105,10 @@ class URLExtractor:
         :param base_url: 基础URL（用于相对路径转换）
         :return: 提取到的URL列表
         """
+        # 相同内容在相同基础路径下已提取过，结果必然全部命中缓存
+        if self._is_seen_content(html_content, base_url):
+            return []
+        
         urls = set()
         
         try:
@@ -57,24 +129,11 @@ class URLExtractor:
         
         # 添加默认 favicon.ico (如果有 base_url)
         if base_url:
-            from urllib.parse import urlparse
-            parsed = urlparse(base_url)
-            if parsed.scheme and parsed.netloc:
-                favicon_url = f"{parsed.scheme}://{parsed.netloc}/favicon.ico"
+            favicon_url = _favicon_for(base_url)
+            if favicon_url:
                 urls.add(favicon_url)
         
-        # 过滤URL
-        filtered_urls = self.filter.filter_batch(list(urls))
-        
-        # 缓存处理
-        new_urls = []
-        for url in filtered_urls:
-            normalized = URLNormalizer.normalize(url, base_url)
-            if normalized and normalized not in self._extracted_cache:
-                self._extracted_cache.add(normalized)
-                new_urls.append(normalized)
-        
-        return new_urls
+        return self._collect_new_urls(urls, base_url)
     
     def extract_from_js(self, js_content: str, base_url: str = None) -> List[str]:
         """
@@ -83,6 +142,10 @@ class URLExtractor:
         :param base_url: 基础URL
         :return: 提取到的URL列表
         """
+        # 相同内容在相同基础路径下已提取过，结果必然全部命中缓存
+        if self._is_seen_content(js_content, base_url):
+            return []
+        
         urls = set()
         
         try:
@@ -91,33 +154,79 @@ class URLExtractor:
             urls.update(regex_urls)
             
             # 提取特定格式的URL
-            specific_patterns = [
-                # Webpack模块
-                re.compile(r'__webpack_require__\(\s*["\']([^"\']+)["\']', re.IGNORECASE),
-                # import/export语句
-                re.compile(r'(?:import|export|from|require)\s*["\']([^"\']+)["\']', re.IGNORECASE),
-                # 模板字符串中的URL
-                re.compile(r'`([^`]+\.(?:js|css|png|jpg|jpeg|gif|svg))`', re.IGNORECASE),
-            ]
-            
-            for pattern in specific_patterns:
-                matches = pattern.findall(js_content)
-                for match in matches:
-                    if isinstance(match, str):
-                        urls.add(match)
+            for pattern in _JS_SPECIFIC_PATTERNS:
+                urls.update(match.group(1) for match in pattern.finditer(js_content))
             
         except Exception as e:
             print_warning(f"Error extracting URLs from JavaScript: {e}")
         
-        # 过滤URL
-        filtered_urls = self.filter.filter_batch(list(urls))
+        return self._collect_new_urls(urls, base_url)
+    
+    def extract_from_json(self, json_content: str, base_url: str = None) -> List[str]:
+        """
+        从JSON内容提取URL
+        :param json_content: JSON内容
+        :param base_url: 基础URL
+        :return: 提取到的URL列表
+        """
+        # 相同内容在相同基础路径下已提取过，结果必然全部命中缓存
+        if self._is_seen_content(json_content, base_url):
+            return []
+        
+        urls = set()
+        
+        try:
+            # 使用正则表达式提取
+            regex_urls = self._extract_with_regex(json_content, base_url)
+            urls.update(regex_urls)
+            
+            # 遍历JSON中的字符串值
+            stack = [json.loads(json_content)]
+            while stack:
+                value = stack.pop()
+                if isinstance(value, dict):
+                    stack.extend(value.values())
+                elif isinstance(value, list):
+                    stack.extend(value)
+                elif isinstance(value, str) and '/' in value:
+                    urls.add(value.strip())
+            
+        except ValueError:
+            # 非法JSON，仅保留正则提取结果
+            pass
+        except Exception as e:
+            print_warning(f"Error extracting URLs from JSON: {e}")
+        
+        return self._collect_new_urls(urls, base_url)
+    
+    def _is_seen_content(self, content: str, base_url: str = None) -> bool:
+        """
+        检查内容是否已在相同基础路径下处理过，未处理过则记录
+        相对路径的解析只取决于base_url的路径部分，因此忽略查询参数和片段
+        """
+        base_key = (base_url or '').split('#', 1)[0].split('?', 1)[0]
+        fingerprint = hash((hash(content), base_key))
+        if fingerprint in self._seen_contents:
+            return True
+        self._seen_contents.add(fingerprint)
+        return False
+    
+    def _collect_new_urls(self, urls: Set[str], base_url: str = None) -> List[str]:
+        """
+        过滤、规范化并去重（单次遍历）
+        :param urls: 候选URL集合
+        :param base_url: 基础URL
+        :return: 新发现的规范化URL列表
+        """
+        normalize = URLNormalizer.normalize
+        cache = self._extracted_cache
+        cache_add = cache.add
         
-        # 缓存处理
         new_urls = []
-        for url in filtered_urls:
-            normalized = URLNormalizer.normalize(url, base_url)
-            if normalized and normalized not in self._extracted_cache:
-                self._extracted_cache.add(normalized)
+        for url in self.filter.iter_allowed(urls):
+            normalized = normalize(url, base_url)
+            if normalized and normalized not in cache:
+                cache_add(normalized)
                 new_urls.append(normalized)
         
         return new_urls
@@ -127,21 +236,14 @@ class URLExtractor:
         urls = set()
         
         for pattern in URL_PATTERNS:
-            matches = pattern.findall(content)
-            for match in matches:
-                if isinstance(match, str):
-                    # 简单字符串匹配
-                    url = match.strip().strip('"').strip("'")
-                    if url:
-                        urls.add(url)
-                elif isinstance(match, tuple):
-                    # 如果正则中有分组，取第一个非空分组
-                    for group in match:
-                        if isinstance(group, str) and group.strip():
-                            url = group.strip().strip('"').strip("'")
-                            if url:
-                                urls.add(url)
-                            break
+            for match in pattern.finditer(content):
+                # 无分组时取整个匹配，否则取第一个非空分组
+                for group in match.groups() or (match.group(0),):
+                    if group and group.strip():
+                        url = group.strip().strip('"').strip("'")
+                        if url:
+                            urls.add(url)
+                        break
         
         return list(urls)
     
@@ -150,66 +252,23 @@ class URLExtractor:
         urls = set()
         
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # 提取各种标签的URL
-            tags_to_extract = {
-                'a': 'href',
-                'img': ['src', 'data-src'],
-                'script': 'src',
-                'iframe': 'src',
-                'form': 'action',
-                'embed': 'src',
-                'source': 'src',
-                'track': 'src',
-                'area': 'href',
-                'base': 'href',
-                'meta': ['content', 'url'],
-            }
-            
-            for tag, attributes in tags_to_extract.items():
-                elements = soup.find_all(tag)
-                for element in elements:
-                    if isinstance(attributes, list):
-                        for attr in attributes:
-                            url = element.get(attr)
-                            if url:
-                                urls.add(url)
-                    else:
-                        url = element.get(attributes)
-                        if url:
-                            urls.add(url)
+            soup = BeautifulSoup(html_content, HTML_PARSER)
             
-            # 特别处理 link 标签 (CSS 和 favicon)
-            link_tags = soup.find_all('link')
-            for link in link_tags:
-                href = link.get('href')
-                if href:
-                    # 提取所有 link 标签的 href
-                    urls.add(href)
-                    # 特别标记 CSS 和 favicon
-                    rel = link.get('rel')
-                    if rel:
-                        rel_str = ' '.join(rel) if isinstance(rel, list) else str(rel)
-                        # stylesheet, icon, shortcut icon 等都要提取
-                        if any(keyword in rel_str.lower() for keyword in ['stylesheet', 'icon']):
-                            urls.add(href)
-            
-            # 提取CSS背景图
-            style_tags = soup.find_all('style')
-            for style in style_tags:
-                if style.string:
-                    bg_pattern = re.compile(r'url\s*\(\s*["\']?([^"\')]+)["\']?\s*\)', re.IGNORECASE)
-                    matches = bg_pattern.findall(style.string)
-                    urls.update(matches)
-            
-            # 提取内联样式
-            elements_with_style = soup.find_all(style=True)
-            for element in elements_with_style:
-                style = element['style']
-                bg_pattern = re.compile(r'url\s*\(\s*["\']?([^"\')]+)["\']?\s*\)', re.IGNORECASE)
-                matches = bg_pattern.findall(style)
-                urls.update(matches)
+            # 单次遍历文档树，同时处理标签属性、<style> 内容和内联样式
+            for element in soup.find_all(True):
+                for attr in _TAG_ATTRS.get(element.name, ()):
+                    url = element.get(attr)
+                    if url:
+                        urls.add(url)
+                
+                # 提取CSS背景图
+                if element.name == 'style' and element.string:
+                    urls.update(_BG_RE.findall(element.string))
+                
+                # 提取内联样式
+                style = element.get('style')
+                if style:
+                    urls.update(_BG_RE.findall(style))
             
         except Exception as e:
             print_warning(f"Error extracting URLs with BeautifulSoup: {e}")
@@ -222,12 +281,10 @@ class URLExtractor:
         
         try:
             # 提取JSON数据中的URL
-            json_pattern = re.compile(r'"url"\s*:\s*["\']([^"\']+)["\']', re.IGNORECASE)
-            urls.update(json_pattern.findall(content))
+            urls.update(match.group(1) for match in _JSON_URL_RE.finditer(content))
             
             # 提取变量中的URL
-            var_pattern = re.compile(r'(?:const|let|var)\s+[a-zA-Z_$][a-zA-Z0-9_$]*\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
-            urls.update(var_pattern.findall(content))
+            urls.update(match.group(1) for match in _VAR_RE.finditer(content))
             
         except Exception as e:
             print_warning(f"Error extracting URLs from JavaScript code: {e}")
@@ -237,6 +294,7 @@ class URLExtractor:
     def clear_cache(self):
         """清除缓存"""
         self._extracted_cache.clear()
+        self._seen_contents.clear()
     
     def get_extracted_count(self) -> int:
         """获取已提取的URL数量"""
@@ -267,7 +325,7 @@ class SubdomainExtractor:
                     continue
                 
                 # 提取主域名部分
-                extracted = tldextract.extract(url_domain)
+                extracted = _tldx(url_domain)
                 domain_parts = [extracted.subdomain, extracted.domain, extracted.suffix]
                 full_domain = '.'.join([part for part in domain_parts if part])
                 
@@ -291,9 +349,8 @@ class SubdomainExtractor:
         try:
             # 匹配子域名模式
             pattern = r'[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.' + re.escape(self.base_domain)
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            
-            for match in matches:
+            for found in re.finditer(pattern, content, re.IGNORECASE):
+                match = found.group(0)
                 if match and match.endswith(self.base_domain) and match != self.base_domain:
                     subdomains.add(match.lower())
             
@@ -5,12 +5,76 @@ URL过滤模块
 """
 
 import re
-from typing import List, Set, Pattern, Optional
+import string
+import functools
+import ipaddress
+from typing import Iterable, Iterator, List, Set, Pattern, Optional, Union
 from urllib.parse import urlparse
 
-from config import BLACKLIST_PATTERNS, ALLOWED_EXTENSIONS
+from config import BLACKLIST_PATTERNS, BLACKLIST_RE, ALLOWED_EXTENSIONS, compile_fast
 from utils import URLNormalizer
 
+# 缓存的 urlparse（同一URL在过滤和分类中会被反复解析）
+_urlparse_cached = functools.lru_cache(maxsize=65536)(urlparse)
+
+# 直接拒绝的URL前缀
+_FAST_BAD_PREFIXES = ('javascript:', 'mailto:', 'tel:', '#', 'data:', 'blob:', 'about:')
+
+# 完整URL或绝对路径的前缀（'/' 已覆盖协议相对的 '//'）
+_URL_PREFIXES = ('https://', 'http://', 'ftp://', '/')
+
+# 从完整URL中提取主机名（不含用户信息和端口）
+_NETLOC_RE = re.compile(r'^[a-zA-Z][a-zA-Z0-9+\-.]*://(?:[^/?#@]*@)?(\[[^\]/?#]*\]|[^/?#:]*)')
+
+# URL分类用的扩展名
+_STATIC_EXTS = ('.js', '.css', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.woff', '.woff2')
+_FILE_EXTS = ('.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx')
+_API_EXTS = ('.json', '.xml')
+_EXT_CATEGORIES = {
+    **{ext[1:]: 'apis' for ext in _API_EXTS},
+    **{ext[1:]: 'files' for ext in _FILE_EXTS},
+    **{ext[1:]: 'static' for ext in _STATIC_EXTS},
+}
+
+# 每个过滤器缓存的过滤结果数量
+_FILTER_CACHE_SIZE = 131072
+
+# ASCII字母数字查找表：字母数字映射为1，其余为0（用 bytes.translate 代替正则字符类）
+_ALNUM_TABLE = bytes(1 if chr(i) in string.ascii_letters + string.digits else 0 for i in range(256))
+
+# URL格式检查用的正则
+_RE_TLD = re.compile(r'^[a-zA-Z0-9_\-]+\.[a-zA-Z]{2,}')                  # 域名形式
+_RE_RELPATH = re.compile(r'^\.{0,2}/?[a-zA-Z0-9_\-/]+\.[a-zA-Z]{1,10}')  # 相对路径文件
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_user_pattern(pattern: str) -> Pattern:
+    """编译用户提供的排除/包含模式（忽略大小写，相同模式只编译一次）"""
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def _as_pattern(pattern: Union[str, Pattern]) -> Pattern:
+    """已编译的正则直接使用，字符串则按用户模式编译"""
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    return _compile_user_pattern(pattern)
+
+
+def _netloc_of(normalized_url: str) -> str:
+    """从规范化后的URL中提取小写主机名（规范化结果总带有协议，无需再次 urlparse）"""
+    match = _NETLOC_RE.match(normalized_url)
+    return match.group(1).lower() if match else ''
+
+
+@functools.lru_cache(maxsize=1024)
+def _is_ip_address(host: str) -> bool:
+    """判断主机名是否为IP地址（IPv6地址可带方括号）"""
+    try:
+        ipaddress.ip_address(host[1:-1] if host.startswith('[') else host)
+    except ValueError:
+        return False
+    return True
+
 
 class URLFilter:
     """URL过滤器"""
@@ -18,14 +82,14 @@ class URLFilter:
     def __init__(self, 
                  domain: Optional[str] = None,
                  include_subdomains: bool = True,
-                 exclude_patterns: List[str] = None,
-                 include_patterns: List[str] = None):
+                 exclude_patterns: List[Union[str, Pattern]] = None,
+                 include_patterns: List[Union[str, Pattern]] = None):
         """
         初始化过滤器
         :param domain: 目标域名
         :param include_subdomains: 是否包含子域名
-        :param exclude_patterns: 排除模式列表
-        :param include_patterns: 包含模式列表
+        :param exclude_patterns: 排除模式列表（字符串或已编译的正则）
+        :param include_patterns: 包含模式列表（字符串或已编译的正则）
         """
         self.domain = domain
         self.include_subdomains = include_subdomains
@@ -35,13 +99,62 @@ class URLFilter:
         self.exclude_patterns: List[Pattern] = BLACKLIST_PATTERNS.copy()
         if exclude_patterns:
             for pattern in exclude_patterns:
-                self.exclude_patterns.append(re.compile(pattern, re.IGNORECASE))
+                self.exclude_patterns.append(_as_pattern(pattern))
         
         # 编译包含模式
         self.include_patterns: List[Pattern] = []
         if include_patterns:
             for pattern in include_patterns:
-                self.include_patterns.append(re.compile(pattern, re.IGNORECASE))
+                self.include_patterns.append(_as_pattern(pattern))
+        
+        # 将用户模式合并为一个交替正则（RE2可用时由RE2匹配），每个URL只需匹配一次
+        self._user_exclude_patterns = self.exclude_patterns[len(BLACKLIST_PATTERNS):]
+        self._exclude_union = self._build_union(self._user_exclude_patterns)
+        self._include_union = self._build_union(self.include_patterns)
+        
+        # 深度爬取时同一URL会在多个页面被反复发现，按URL缓存过滤结果
+        self._reset_filter_cache()
+    
+    def _reset_filter_cache(self):
+        """重建过滤结果缓存（过滤规则变化后必须调用）"""
+        self._filter_cached = functools.lru_cache(maxsize=_FILTER_CACHE_SIZE)(self._filter_uncached)
+    
+    def set_domain(self, domain: Optional[str]):
+        """
+        切换目标域名，保留已编译的排除/包含规则
+        :param domain: 新的目标域名
+        """
+        self.domain = domain
+        self.base_domain = URLNormalizer.get_base_domain(domain) if domain else None
+        self._reset_filter_cache()
+    
+    @staticmethod
+    def _build_union(patterns: List[Pattern]) -> Optional[Pattern]:
+        """
+        合并正则模式列表
+        :return: 合并后的正则；模式为空、含区分大小写的模式或无法合并（如含全局内联标志）时返回None
+        """
+        if not patterns or any(not pattern.flags & re.IGNORECASE for pattern in patterns):
+            return None
+        try:
+            return compile_fast('|'.join(f'(?:{pattern.pattern})' for pattern in patterns), re.IGNORECASE)
+        except re.error:
+            return None
+    
+    @staticmethod
+    def _search_any(union: Optional[Pattern], patterns: List[Pattern], url: str) -> bool:
+        """检查URL是否匹配任一模式（优先使用合并后的正则）"""
+        if union is not None:
+            return union.search(url) is not None
+        return any(pattern.search(url) for pattern in patterns)
+    
+    def _is_excluded(self, normalized_url: str) -> bool:
+        """检查规范化后的URL是否命中黑名单或用户排除模式"""
+        if BLACKLIST_RE.search(normalized_url):
+            return True
+        return bool(self._user_exclude_patterns) and self._search_any(
+            self._exclude_union, self._user_exclude_patterns, normalized_url
+        )
     
     def filter(self, url: str) -> bool:
         """
@@ -49,12 +162,20 @@ class URLFilter:
         :param url: 待过滤的URL
         :return: True表示通过过滤，False表示被过滤
         """
+        return self._filter_cached(url)
+    
+    def _filter_uncached(self, url: str) -> bool:
+        """过滤URL的实际实现（结果由 filter 缓存）"""
         # 基本验证
-        if not url or url.strip() == "":
+        if not url:
             return False
         
         url = url.strip()
         
+        # 最廉价的检查优先：长度和常见的非URL协议前缀（C实现的 startswith，无需正则）
+        if len(url) < 3 or url.startswith(_FAST_BAD_PREFIXES):
+            return False
+        
         # URL 格式有效性检查
         if not self._is_valid_url_format(url):
             return False
@@ -65,15 +186,22 @@ class URLFilter:
             return False
         
         # 检查黑名单模式
-        for pattern in self.exclude_patterns:
-            if pattern.search(normalized_url):
-                return False
+        if self._is_excluded(normalized_url):
+            return False
         
+        # 域名过滤和包含模式
+        url_domain = _netloc_of(normalized_url) if self.domain else ''
+        return self._passes_domain_rules(normalized_url, url_domain)
+    
+    def _passes_domain_rules(self, normalized_url: str, url_domain: str) -> bool:
+        """
+        域名过滤和包含模式检查
+        :param normalized_url: 规范化后的URL
+        :param url_domain: URL的主机名（小写，不含端口）
+        :return: True表示通过
+        """
         # 域名过滤
         if self.domain:
-            parsed = urlparse(normalized_url)
-            url_domain = parsed.netloc.lower()
-            
             if not url_domain:
                 # 相对URL，默认通过
                 pass
@@ -102,20 +230,15 @@ class URLFilter:
         if len(url) < 3:
             return False
         
-        # 排除只包含特殊字符的 URL
-        if re.match(r'^[^a-zA-Z0-9/]+$', url):
-            return False
-        
-        # 必须包含至少一个字母或数字
-        if not re.search(r'[a-zA-Z0-9]', url):
+        # 必须包含至少一个字母或数字（同时排除了只包含特殊字符的 URL）
+        if 1 not in url.encode('latin-1', 'ignore').translate(_ALNUM_TABLE):
             return False
         
         # 检查是否为有效的 URL 格式
         # 完整 URL 或相对路径
-        if not (url.startswith(('http://', 'https://', 'ftp://', '//', '/')) or 
-                re.match(r'^[a-zA-Z0-9_\-]+\.[a-zA-Z]{2,}', url)):
+        if not (url.startswith(_URL_PREFIXES) or _RE_TLD.match(url)):
             # 检查是否为相对路径文件
-            if not re.match(r'^\.{0,2}/?[a-zA-Z0-9_\-/]+\.[a-zA-Z]{1,10}', url):
+            if not _RE_RELPATH.match(url):
                 return False
         
         return True
@@ -125,26 +248,35 @@ class URLFilter:
         if not url_domain or not base_domain:
             return False
         
-        return url_domain == base_domain or url_domain.endswith('.' + base_domain)
+        # 先比较长度和分隔点位置，避免每次拼接 '.' + base_domain
+        domain_len, base_len = len(url_domain), len(base_domain)
+        if domain_len == base_len:
+            return url_domain == base_domain
+        
+        # IP地址没有子域名
+        if _is_ip_address(base_domain):
+            return False
+        return (domain_len > base_len
+                and url_domain[domain_len - base_len - 1] == '.'
+                and url_domain.endswith(base_domain))
     
     def _matches_include_patterns(self, url: str) -> bool:
         """检查是否匹配包含模式"""
         if not self.include_patterns:
             return False
         
-        for pattern in self.include_patterns:
-            if pattern.search(url):
-                return True
-        
-        return False
+        return self._search_any(self._include_union, self.include_patterns, url)
+    
+    def iter_allowed(self, urls: Iterable[str]) -> Iterator[str]:
+        """逐个产出通过过滤的URL，不构建中间列表"""
+        allow = self.filter
+        for url in urls:
+            if allow(url):
+                yield url
     
     def filter_batch(self, urls: List[str]) -> List[str]:
         """批量过滤URL"""
-        filtered = []
-        for url in urls:
-            if self.filter(url):
-                filtered.append(url)
-        return filtered
+        return list(self.iter_allowed(urls))
     
     def categorize_urls(self, urls: List[str]) -> dict:
         """
@@ -163,26 +295,30 @@ class URLFilter:
         if not self.domain:
             return categories
         
+        # 循环不变量提前计算
+        self_domain = URLNormalizer.get_domain(self.domain)
+        base_domain = self.base_domain
+        
         for url in urls:
             normalized = URLNormalizer.normalize(url, self.domain)
-            parsed = urlparse(normalized)
+            parsed = _urlparse_cached(normalized)
             
-            # 检查文件类型
+            # 检查文件类型（按扩展名一次查表）
             path = parsed.path.lower()
-            if any(path.endswith(ext) for ext in ['.js', '.css', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.woff', '.woff2']):
-                categories['static'].append(normalized)
-            elif any(path.endswith(ext) for ext in ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx']):
-                categories['files'].append(normalized)
-            elif '/api/' in path or path.endswith(('.json', '.xml')):
-                categories['apis'].append(normalized)
+            _, dot, ext = path.rpartition('.')
+            category = _EXT_CATEGORIES.get(ext) if dot else None
+            if category is None and '/api/' in path:
+                category = 'apis'
+            if category:
+                categories[category].append(normalized)
             
             # 检查域名
             url_domain = parsed.netloc.lower()
             if not url_domain:
                 categories['internal'].append(normalized)
-            elif url_domain == URLNormalizer.get_domain(self.domain):
+            elif url_domain == self_domain:
                 categories['internal'].append(normalized)
-            elif URLNormalizer.get_base_domain(url_domain) == self.base_domain:
+            elif URLNormalizer.get_base_domain(url_domain) == base_domain:
                 categories['subdomains'].append(normalized)
             else:
                 categories['external'].append(normalized)
@@ -6,15 +6,16 @@ URLSpider - 快速从网站中提取URL和子域名的工具
 """
 
 import argparse
+import re
 import sys
 import os
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional
 
 # 直接导入本地模块
 import config
 from utils import (
     print_color, print_success, print_error, print_warning, print_info,
-    Fore, Style, is_valid_url, URLNormalizer
+    set_color_enabled, Fore, Style, is_valid_url, URLNormalizer
 )
 from filter import URLFilter
 from extractor import URLExtractor, SubdomainExtractor
@@ -22,6 +23,23 @@ from crawler import WebCrawler
 from output import ResultExporter, ResultPrinter
 
 
+# Cookie解析：按 ';' 分段，取第一个 '=' 前后的键和值（去除段首尾空白，忽略不含 '=' 的段）
+_COOKIE_RE = re.compile(r'(?:^|;)\s*([^;=]*)=([^;]*?)\s*(?=;|$)')
+
+
+def _iter_lines(path: str) -> Iterator[str]:
+    """
+    逐行读取文件，不把整个文件载入内存
+    :param path: 文件路径
+    :return: 去除首尾空白后的非空行
+    """
+    with open(path, 'r', encoding='utf-8', buffering=1 << 20) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+
 class URLSpider:
     """URLSpider 主类"""
     
@@ -171,9 +189,7 @@ class URLSpider:
         
         # 禁用彩色输出
         if self.args.no_color:
-            global Fore, Style
-            Fore = type('Fore', (), {k: '' for k in dir(Fore) if not k.startswith('_')})()
-            Style = type('Style', (), {k: '' for k in dir(Style) if not k.startswith('_')})()
+            set_color_enabled(False)
     
     def initialize(self):
         """初始化组件"""
@@ -191,9 +207,11 @@ class URLSpider:
         if self.args.filter:
             include_patterns.append(self.args.filter)
         
+        target = self.args.url or None
+        
         # 初始化过滤器
         self.filter = URLFilter(
-            domain=self.args.url if self.args.url else None,
+            domain=target,
             include_subdomains=not self.args.include_external,
             exclude_patterns=exclude_patterns,
             include_patterns=include_patterns
@@ -201,7 +219,7 @@ class URLSpider:
         
         # 初始化提取器
         self.extractor = URLExtractor(
-            domain=self.args.url if self.args.url else None,
+            domain=target,
             filter_rules=self.filter
         )
         
@@ -211,13 +229,7 @@ class URLSpider:
             headers['User-Agent'] = self.args.user_agent
         
         # 构建Cookies
-        cookies = {}
-        if self.args.cookie:
-            for cookie_pair in self.args.cookie.split(';'):
-                cookie_pair = cookie_pair.strip()
-                if '=' in cookie_pair:
-                    key, value = cookie_pair.split('=', 1)
-                    cookies[key] = value
+        cookies = dict(_COOKIE_RE.findall(self.args.cookie)) if self.args.cookie else {}
         
         # 初始化爬虫
         self.crawler = WebCrawler(
@@ -268,54 +280,36 @@ class URLSpider:
         if not self.args.quiet:
             print_info(f"开始处理文件: {self.args.file}")
         
-        # 读取文件内容
-        with open(self.args.file, 'r', encoding='utf-8') as f:
-            lines = [line.strip() for line in f.readlines() if line.strip()]
+        # 深度爬取时按行数均分页数上限，先流式统计一遍行数
+        if self.args.deep:
+            line_count = sum(1 for _ in _iter_lines(self.args.file))
+            pages_per_url = self.args.max_pages // max(1, line_count)
+        
+        # 提取URL和子域名（用有序字典在收集时去重）
+        all_urls: Dict[str, None] = {}
+        all_subdomains: Dict[str, None] = {}
         
-        # 提取URL和子域名
-        all_urls = []
-        all_subdomains = []
+        # 所有URL共用同一个爬虫（复用连接池和已编译的过滤规则），只切换目标域名
+        base_url = None
         
-        for line in lines:
+        for line in _iter_lines(self.args.file):
             if not self.args.quiet:
                 print_info(f"处理: {line}")
             
             if is_valid_url(line):
                 # 如果是URL，爬取它
-                original_url = self.args.url if hasattr(self.args, 'url') else None
-                self.args.url = line
-                
-                # 临时初始化以处理这个URL
-                temp_filter = URLFilter(
-                    domain=line,
-                    include_subdomains=not self.args.include_external,
-                    exclude_patterns=[self.args.exclude] if self.args.exclude else [],
-                    include_patterns=[self.args.filter] if self.args.filter else []
-                )
-                
-                temp_extractor = URLExtractor(
-                    domain=line,
-                    filter_rules=temp_filter
-                )
-                
-                temp_crawler = WebCrawler(
-                    timeout=self.args.timeout,
-                    max_retries=self.args.retries,
-                    max_workers=min(self.args.threads, 2),  # 限制每个URL的线程数
-                    headers={'User-Agent': config.USER_AGENTS[0]},
-                    cookies={}
-                )
-                temp_crawler.set_extractor(temp_extractor)
+                base_url = line
+                self.extractor.set_domain(line)
                 
                 if self.args.deep:
-                    urls, subdomains = temp_crawler.crawl_deep(
+                    urls, subdomains = self.crawler.crawl_deep(
                         start_url=line,
                         max_depth=self.args.depth,
-                        max_pages=self.args.max_pages // max(1, len(lines)),
+                        max_pages=pages_per_url,
                         extract_js=self.args.js
                     )
                 else:
-                    urls, _ = temp_crawler.crawl_page(line, self.args.js)
+                    urls, _ = self.crawler.crawl_page(line, self.args.js)
                     
                     # 提取子域名
                     if urls:
@@ -324,12 +318,8 @@ class URLSpider:
                     else:
                         subdomains = []
                 
-                all_urls.extend(urls)
-                all_subdomains.extend(subdomains)
-                
-                # 恢复原始URL
-                if original_url:
-                    self.args.url = original_url
+                all_urls.update(dict.fromkeys(urls))
+                all_subdomains.update(dict.fromkeys(subdomains))
             else:
                 # 假设是JS代码或文件路径
                 try:
@@ -341,17 +331,14 @@ class URLSpider:
                         # 是JS代码片段
                         content = line
                     
-                    urls = self.extractor.extract_from_js(content, self.args.url if hasattr(self.args, 'url') else None)
-                    all_urls.extend(urls)
+                    # 相对路径按最近处理的URL解析
+                    urls = self.extractor.extract_from_js(content, base_url)
+                    all_urls.update(dict.fromkeys(urls))
                 except Exception as e:
                     if not self.args.quiet:
                         print_warning(f"处理 '{line}' 时出错: {e}")
         
-        # 去重
-        unique_urls = list(set(all_urls))
-        unique_subdomains = list(set(all_subdomains))
-        
-        return unique_urls, unique_subdomains
+        return list(all_urls), list(all_subdomains)
     
     def run(self):
         """运行主程序"""
@@ -367,15 +354,17 @@ class URLSpider:
         else:
             urls, subdomains = self.process_file()
         
-        # 去重和排序
-        urls = sorted(set(urls), key=lambda x: (URLNormalizer.get_domain(x) or '', x))
+        # 去重和排序：先装饰为 (域名, URL) 再排序，每个URL只解析一次域名，统计时复用
+        decorated = sorted((URLNormalizer.get_domain(url) or '', url) for url in set(urls))
+        urls = [url for _, url in decorated]
         subdomains = sorted(set(subdomains))
         
         # 输出结果
         if not self.args.quiet:
-            ResultPrinter.print_summary(urls, subdomains, self.args.url if self.args.url else None)
-            ResultPrinter.print_categorized(urls, self.args.url if self.args.url else None)
-            ResultPrinter.print_statistics(urls, self.args.url if self.args.url else None)
+            target = self.args.url or None
+            ResultPrinter.print_summary(urls, subdomains, target)
+            ResultPrinter.print_categorized(urls, target)
+            ResultPrinter.print_statistics(urls, target)
         
         # 导出结果
         if urls or subdomains:
@@ -392,7 +381,7 @@ class URLSpider:
                     'statistics': {
                         'total_urls': len(urls),
                         'total_subdomains': len(subdomains),
-                        'unique_domains': len(set(URLNormalizer.get_domain(url) for url in urls if URLNormalizer.get_domain(url))),
+                        'unique_domains': len({domain for domain, _ in decorated if domain}),
                     }
                 }
                 self.exporter.export_json(data)
@@ -4,11 +4,19 @@
 输出格式化模块
 """
 
+import re
 import json
 import csv
 import os
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from urllib.parse import urlparse
+
+# 可选：orjson（C实现的JSON编码器），不可用时回退到标准json
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from utils import (
     print_color, print_success, print_error, print_warning, print_info,
@@ -16,6 +24,47 @@ from utils import (
 )
 from filter import URLFilter
 
+# 拆分URL：协议、域名、路径、查询参数（不含fragment）
+_CSV_URL_RE = re.compile(r'^([^:/?#]+)://([^/?#]*)([^?#]*)(?:\?([^#]*))?')
+
+# 结果分类用的扩展名
+_IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.webp')
+_DOCUMENT_EXTS = ('.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx')
+_API_EXTS = ('.json', '.xml')
+_PAGE_EXTS = ('.html', '.htm', '.php', '.asp', '.aspx', '.jsp')
+_CATEGORY_BY_EXT = {
+    'js': 'JavaScript',
+    'css': 'CSS',
+    **{ext[1:]: 'Images' for ext in _IMAGE_EXTS},
+    **{ext[1:]: 'Documents' for ext in _DOCUMENT_EXTS},
+    **{ext[1:]: 'APIs' for ext in _API_EXTS},
+    **{ext[1:]: 'Pages' for ext in _PAGE_EXTS},
+}
+# 统计中计为图片的扩展名（不含 .webp）
+_STAT_IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico')
+
+# 文本导出时每次写入的行数（分块拼接，避免超大列表一次性拼成一个字符串）
+_WRITE_BLOCK_LINES = 65536
+
+
+def _write_lines(path: str, lines: List[str]) -> None:
+    """
+    按块拼接、编码后直接写入文件描述符，每行一个条目
+    :param path: 文件路径
+    :param lines: 要写入的行（不含换行符）
+    """
+    # 绕过 TextIOWrapper/BufferedWriter，换行符与文本模式一致
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        for start in range(0, len(lines), _WRITE_BLOCK_LINES):
+            block = lines[start:start + _WRITE_BLOCK_LINES]
+            data = memoryview((os.linesep.join(block) + os.linesep).encode('utf-8'))
+            # os.write 可能只写入一部分，循环直到写完
+            while data:
+                data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
 
 class ResultExporter:
     """结果导出器"""
@@ -34,12 +83,14 @@ class ResultExporter:
     def export_text(self, 
                    urls: List[str], 
                    subdomains: List[str],
-                   filename: Optional[str] = None) -> Dict[str, str]:
+                   filename: Optional[str] = None,
+                   ordered: bool = True) -> Dict[str, str]:
         """
         导出为文本文件
         :param urls: URL列表
         :param subdomains: 子域名列表
         :param filename: 文件名（不包含扩展名）
+        :param ordered: 是否排序后写入；为False时按传入顺序写入，省去排序开销
         :return: 文件路径字典
         """
         if not filename:
@@ -50,18 +101,14 @@ class ResultExporter:
         # 导出URL
         if urls:
             url_file = os.path.join(self.output_dir, f"{filename}_urls.txt")
-            with open(url_file, 'w', encoding='utf-8') as f:
-                for url in sorted(urls):
-                    f.write(f"{url}\n")
+            _write_lines(url_file, sorted(urls) if ordered else list(urls))
             file_paths['urls'] = url_file
             print_success(f"Exported {len(urls)} URLs to: {url_file}")
         
         # 导出子域名
         if subdomains:
             subdomain_file = os.path.join(self.output_dir, f"{filename}_subdomains.txt")
-            with open(subdomain_file, 'w', encoding='utf-8') as f:
-                for subdomain in sorted(subdomains):
-                    f.write(f"{subdomain}\n")
+            _write_lines(subdomain_file, sorted(subdomains) if ordered else list(subdomains))
             file_paths['subdomains'] = subdomain_file
             print_success(f"Exported {len(subdomains)} subdomains to: {subdomain_file}")
         
@@ -69,11 +116,13 @@ class ResultExporter:
     
     def export_json(self, 
                    data: Dict[str, Any],
-                   filename: Optional[str] = None) -> str:
+                   filename: Optional[str] = None,
+                   indent: bool = False) -> str:
         """
         导出为JSON文件
         :param data: 要导出的数据
         :param filename: 文件名（不包含扩展名）
+        :param indent: 是否缩进输出（便于阅读），默认输出紧凑格式
         :return: 文件路径
         """
         if not filename:
@@ -81,19 +130,29 @@ class ResultExporter:
         
         json_file = os.path.join(self.output_dir, f"{filename}.json")
         
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+            with open(json_file, 'wb', buffering=1 << 20) as f:
+                f.write(orjson.dumps(data, option=option))
+        else:
+            with open(json_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+                if indent:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                else:
+                    json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
         
         print_success(f"Exported results to JSON: {json_file}")
         return json_file
     
     def export_csv(self, 
                   urls: List[str],
-                  filename: Optional[str] = None) -> str:
+                  filename: Optional[str] = None,
+                  order: str = 'none') -> str:
         """
         导出为CSV文件
         :param urls: URL列表
         :param filename: 文件名（不包含扩展名）
+        :param order: 'none' 按传入顺序写入（默认，省去排序）；'sorted' 按URL排序，便于比对结果
         :return: 文件路径
         """
         if not filename:
@@ -101,31 +160,29 @@ class ResultExporter:
         
         csv_file = os.path.join(self.output_dir, f"{filename}.csv")
         
-        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+        iterable = sorted(urls) if order == 'sorted' else urls
+        rows = [self._row_for(url) for url in iterable]
+        with open(csv_file, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
             writer = csv.writer(f)
             writer.writerow(['URL', 'Scheme', 'Domain', 'Path', 'Parameters'])
-            
-            for url in sorted(urls):
-                try:
-                    parsed = URLNormalizer.normalize(url)
-                    scheme = parsed.split('://')[0] if '://' in parsed else ''
-                    domain = URLNormalizer.get_domain(parsed)
-                    path = parsed.split(domain, 1)[1] if domain else parsed
-                    
-                    # 分割路径和参数
-                    if '?' in path:
-                        path_part, param_part = path.split('?', 1)
-                        params = param_part
-                    else:
-                        path_part = path
-                        params = ''
-                    
-                    writer.writerow([url, scheme, domain, path_part, params])
-                except Exception as e:
-                    writer.writerow([url, '', '', '', f'Error: {str(e)}'])
+            writer.writerows(rows)
         
         print_success(f"Exported {len(urls)} URLs to CSV: {csv_file}")
         return csv_file
+    
+    @staticmethod
+    def _row_for(url: str) -> tuple:
+        """
+        将URL拆分为CSV行
+        :param url: URL
+        :return: (URL, 协议, 域名, 路径, 参数)
+        """
+        # 爬取结果已经规范化，直接一次正则匹配拆出协议、域名、路径和参数
+        match = _CSV_URL_RE.match(url)
+        if not match:
+            return url, '', '', '', ''
+        scheme, domain, path, params = match.groups()
+        return url, scheme.lower(), domain.lower(), path or '/', params or ''
 
 
 class ResultPrinter:
@@ -133,7 +190,7 @@ class ResultPrinter:
     
     @staticmethod
     def print_summary(urls: List[str], subdomains: List[str], domain: str = None):
-        """打印结果摘要"""
+        """打印结果摘要（按传入顺序显示，调用方负责排序）"""
         print("\n" + "="*60)
         print_color("RESULTS SUMMARY", Fore.GREEN, Style.BRIGHT)
         print("="*60)
@@ -147,19 +204,16 @@ class ResultPrinter:
         # 如果URL数量较多，只显示部分
         if urls and len(urls) > 50:
             print(f"\n{Fore.YELLOW}Displaying first 50 URLs:{Fore.RESET}")
-            for i, url in enumerate(urls[:50], 1):
-                print(f"  {i:3d}. {url}")
+            print('\n'.join(f"  {i:3d}. {url}" for i, url in enumerate(urls[:50], 1)))
             print(f"  ... and {len(urls) - 50} more URLs")
         elif urls:
             print(f"\n{Fore.YELLOW}URLs:{Fore.RESET}")
-            for i, url in enumerate(urls, 1):
-                print(f"  {i:3d}. {url}")
+            print('\n'.join(f"  {i:3d}. {url}" for i, url in enumerate(urls, 1)))
         
         # 显示子域名
         if subdomains:
             print(f"\n{Fore.YELLOW}Subdomains:{Fore.RESET}")
-            for i, subdomain in enumerate(sorted(subdomains), 1):
-                print(f"  {i:3d}. {subdomain}")
+            print('\n'.join(f"  {i:3d}. {subdomain}" for i, subdomain in enumerate(subdomains, 1)))
         
         print("="*60)
     
@@ -188,27 +242,19 @@ class ResultPrinter:
         for url in urls:
             url_lower = url.lower()
             
-            if url_lower.endswith('.js'):
-                categories['JavaScript'].append(url)
-            elif url_lower.endswith('.css'):
-                categories['CSS'].append(url)
-            elif any(url_lower.endswith(ext) for ext in ['.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.webp']):
-                categories['Images'].append(url)
-            elif any(url_lower.endswith(ext) for ext in ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx']):
-                categories['Documents'].append(url)
-            elif '/api/' in url_lower or any(url_lower.endswith(ext) for ext in ['.json', '.xml']):
-                categories['APIs'].append(url)
-            elif any(url_lower.endswith(ext) for ext in ['.html', '.htm', '.php', '.asp', '.aspx', '.jsp']):
-                categories['Pages'].append(url)
-            else:
-                categories['Others'].append(url)
+            # 按扩展名一次查表；无扩展名或普通页面中路径含 /api/ 的归为API
+            _, dot, ext = url_lower.rpartition('.')
+            category = _CATEGORY_BY_EXT.get(ext) if dot else None
+            if (category is None or category == 'Pages') and '/api/' in url_lower:
+                category = 'APIs'
+            categories[category or 'Others'].append(url)
         
         # 打印分类结果
         for category, urls_in_category in categories.items():
             if urls_in_category:
                 print(f"\n{Fore.CYAN}{category} ({len(urls_in_category)}):{Fore.RESET}")
-                for url in urls_in_category[:10]:  # 每类最多显示10个
-                    print(f"  • {url}")
+                # 每类最多显示10个，拼接后一次输出
+                print('\n'.join(f"  • {url}" for url in urls_in_category[:10]))
                 if len(urls_in_category) > 10:
                     print(f"  ... and {len(urls_in_category) - 10} more")
         
@@ -224,16 +270,40 @@ class ResultPrinter:
         print_color("STATISTICS", Fore.GREEN, Style.BRIGHT)
         print("="*60)
         
-        # 计算统计信息
+        # 计算统计信息（一次遍历完成所有计数）
+        domains = set()
+        http_count = https_count = js_count = css_count = image_count = api_count = 0
+        for url in urls:
+            url_lower = url.lower()
+            
+            url_domain = URLNormalizer.get_domain(url)
+            if url_domain:
+                domains.add(url_domain)
+            
+            if url.startswith('http://'):
+                http_count += 1
+            elif url.startswith('https://'):
+                https_count += 1
+            
+            if url_lower.endswith('.js'):
+                js_count += 1
+            elif url_lower.endswith('.css'):
+                css_count += 1
+            elif url_lower.endswith(_STAT_IMAGE_EXTS):
+                image_count += 1
+            
+            if '/api/' in url_lower:
+                api_count += 1
+        
         stats = {
             'Total URLs': len(urls),
-            'Unique Domains': len(set(URLNormalizer.get_domain(url) for url in urls if URLNormalizer.get_domain(url))),
-            'HTTP URLs': len([url for url in urls if url.startswith('http://')]),
-            'HTTPS URLs': len([url for url in urls if url.startswith('https://')]),
-            'JS Files': len([url for url in urls if url.lower().endswith('.js')]),
-            'CSS Files': len([url for url in urls if url.lower().endswith('.css')]),
-            'Image Files': len([url for url in urls if any(url.lower().endswith(ext) for ext in ['.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico'])]),
-            'API Endpoints': len([url for url in urls if '/api/' in url.lower()]),
+            'Unique Domains': len(domains),
+            'HTTP URLs': http_count,
+            'HTTPS URLs': https_count,
+            'JS Files': js_count,
+            'CSS Files': css_count,
+            'Image Files': image_count,
+            'API Endpoints': api_count,
         }
         
         # 打印统计信息
@@ -251,10 +321,7 @@ class ResultPrinter:
                 # 提取路径频率
                 path_freq = {}
                 for url in internal_urls:
-                    parsed = URLNormalizer.normalize(url)
-                    path = parsed.split(base_domain, 1)[1] if base_domain in parsed else parsed
-                    if '?' in path:
-                        path = path.split('?')[0]
+                    path = urlparse(URLNormalizer.normalize(url)).path
                     if path not in path_freq:
                         path_freq[path] = 0
                     path_freq[path] += 1
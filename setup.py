@@ -10,6 +10,8 @@ setup(
         "beautifulsoup4>=4.9.0",
         "colorama>=0.4.4",
         "tldextract>=3.1.0",
+        "aiohttp>=3.8.0",
+        "lxml>=4.6.0",
     ],
     entry_points={
         "console_scripts": [
@@ -20,5 +22,5 @@ setup(
     description="快速从网站中提取URL和子域名的工具",
     long_description=open("README.md", encoding="utf-8").read() if os.path.exists("README.md") else "",
     long_description_content_type="text/markdown",
-    python_requires=">=3.6",
+    python_requires=">=3.7",
 )
\ No newline at end of file
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""--no-color 输出测试"""
+
+import pytest
+
+import utils
+from utils import ProgressBar, print_info, set_color_enabled
+from output import ResultPrinter
+
+
+URLS = [
+    'https://example.com/app.js',
+    'https://example.com/style.css',
+    'https://example.com/api/users',
+    'https://example.com/index.html',
+]
+
+
+@pytest.fixture
+def no_color():
+    set_color_enabled(False)
+    yield
+    set_color_enabled(True)
+
+
+def _print_everything():
+    print_info("info")
+    ResultPrinter.print_summary(URLS, ['a.example.com'], 'https://example.com')
+    ResultPrinter.print_categorized(URLS, 'https://example.com')
+    ResultPrinter.print_statistics(URLS, 'https://example.com')
+    with ProgressBar(2, 'Crawling') as bar:
+        bar.update()
+        bar.update()
+
+
+def test_no_color_output_has_no_ansi_codes(no_color, capsys):
+    _print_everything()
+    out = capsys.readouterr().out
+    assert 'URLs Found:' in out
+    assert 'Crawling:' in out
+    assert '\x1b[' not in out
+
+
+def test_color_output_enabled_by_default(capsys):
+    assert utils.Fore.YELLOW
+    _print_everything()
+    assert '\x1b[' in capsys.readouterr().out
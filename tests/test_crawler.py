@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""爬虫测试（本地HTTP服务）"""
+
+import asyncio
+import functools
+import threading
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+
+import pytest
+
+from crawler import WebCrawler
+from extractor import URLExtractor
+from filter import URLFilter
+
+
+# index -> a, b ; a -> deep1 ; b -> deep2
+PAGES = {
+    'index.html': '<a href="/a.html">a</a><a href="/b.html">b</a>',
+    'a.html': '<a href="/deep1.html">d1</a>',
+    'b.html': '<a href="/deep2.html">d2</a>',
+    'deep1.html': '<a href="/x1.html">x1</a>',
+    'deep2.html': '<a href="/x2.html">x2</a>',
+    'app.html': '<script src="/app.js"></script><script src="/lib.js"></script>',
+}
+
+SCRIPTS = {
+    'app.js': "fetch('/api/from-app.json');",
+    'lib.js': "fetch('/api/from-lib.json');",
+}
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def site(tmp_path_factory):
+    root = tmp_path_factory.mktemp('site')
+    for name, body in PAGES.items():
+        (root / name).write_text(f'<html><body>{body}</body></html>', encoding='utf-8')
+    for name, body in SCRIPTS.items():
+        (root / name).write_text(body, encoding='utf-8')
+    
+    handler = functools.partial(_QuietHandler, directory=str(root))
+    server = HTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def _new_crawler(start_url):
+    crawler = WebCrawler(timeout=5, max_retries=0)
+    url_filter = URLFilter(domain=start_url)
+    crawler.set_extractor(URLExtractor(domain=start_url, filter_rules=url_filter))
+    return crawler
+
+
+def _crawl(start_url, max_pages):
+    crawler = _new_crawler(start_url)
+    crawler.crawl_deep(start_url, max_depth=3, max_pages=max_pages)
+    return crawler.visited_urls
+
+
+def test_page_budget_is_spent_breadth_first(site):
+    visited = _crawl(f'{site}/index.html', max_pages=3)
+    assert visited == {f'{site}/index.html', f'{site}/a.html', f'{site}/b.html'}
+
+
+def test_limited_crawl_is_repeatable(site):
+    # 第一层为 a、b 和自动补充的 favicon.ico，第五个名额按顺序落到 deep1
+    first = _crawl(f'{site}/index.html', max_pages=5)
+    second = _crawl(f'{site}/index.html', max_pages=5)
+    assert first == second
+    assert f'{site}/deep1.html' in first
+    assert f'{site}/deep2.html' not in first
+
+
+def test_page_js_fetches_run_in_one_session(site):
+    crawler = _new_crawler(f'{site}/app.html')
+    page_urls, _ = asyncio.run(crawler.crawl_page_async(f'{site}/app.html', extract_js=True))
+    # 页面中的多个JS文件并发获取，共用同一个会话
+    assert {f'{site}/app.js', f'{site}/lib.js'} <= crawler.visited_urls
+    assert {f'{site}/api/from-app.json', f'{site}/api/from-lib.json'} <= set(page_urls)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""URL提取测试"""
+
+from extractor import URLExtractor, SubdomainExtractor
+from filter import URLFilter
+
+
+def test_regex_keeps_url_inside_full_url_match():
+    extractor = URLExtractor()
+    urls = extractor._extract_with_regex("url(https://cdn.a.com/bg.png),url('/img/b.png')")
+    assert '/img/b.png' in urls
+
+
+def test_regex_keeps_quoted_path_after_fetch_argument():
+    extractor = URLExtractor()
+    urls = extractor._extract_with_regex("fetch(\"https://x/data?x=1,'/b/c.php'\")")
+    assert '/b/c.php' in urls
+
+
+def test_extract_from_html_resolves_overlapping_paths():
+    base_url = 'https://www.example.com/'
+    extractor = URLExtractor(domain=base_url, filter_rules=URLFilter(domain=base_url))
+    html = (
+        '<html><body>'
+        '<div style="background:url(https://cdn.a.com/bg.png),url(\'/img/b.png\')"></div>'
+        '<script>fetch("https://x/data?x=1,\'/b/c.php\'")</script>'
+        '</body></html>'
+    )
+    urls = extractor.extract_from_html(html, base_url)
+    assert 'https://www.example.com/b/c.php' in urls
+    assert 'https://www.example.com/img/b.png' in urls
+
+
+def test_subdomains_follow_the_base_domain_suffix_list():
+    extractor = SubdomainExtractor('https://www.example.co.uk/')
+    subdomains = extractor.extract_from_urls([
+        'https://api.example.co.uk/v1',
+        'https://static.example.co.uk:8443/app.js',
+        'https://example.co.uk/',
+        'https://other.co.uk/',
+    ])
+    assert subdomains == {'api.example.co.uk', 'static.example.co.uk'}
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""URL过滤测试"""
+
+from filter import URLFilter
+
+
+def test_exclude_word_boundary_uses_unicode_semantics():
+    # é 和 x 都是Unicode单词字符，两者之间没有单词边界，不应被排除
+    url_filter = URLFilter(domain='https://example.com/', exclude_patterns=[r'\bcafé\b'])
+    assert url_filter.filter('https://example.com/caféx/a.js')
+    assert not url_filter.filter('https://example.com/café/a.js')
+
+
+def test_include_digit_class_matches_unicode_digits():
+    url_filter = URLFilter(include_patterns=[r'/v\d/'])
+    assert url_filter.filter('https://example.com/v٣/a.js')
+
+
+def test_single_label_host_ending_in_digit_keeps_subdomains():
+    url_filter = URLFilter(domain='http://web01/')
+    assert url_filter.filter('http://api.web01/x.php')
+
+
+def test_ip_address_target_has_no_subdomains():
+    url_filter = URLFilter(domain='http://192.168.1.5/')
+    assert url_filter.filter('http://192.168.1.5/a.php')
+    assert not url_filter.filter('http://10.192.168.1.5/a.php')
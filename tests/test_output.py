@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""结果打印测试"""
+
+from utils import set_color_enabled
+from output import ResultPrinter
+
+
+def test_common_paths_exclude_port(capsys):
+    urls = [
+        'http://localhost:8765/page2.html',
+        'http://localhost:8765/page2.html?id=1',
+        'http://localhost:8765/api/users',
+    ]
+    set_color_enabled(False)
+    try:
+        ResultPrinter.print_statistics(urls, 'http://localhost:8765/')
+    finally:
+        set_color_enabled(True)
+    
+    out = capsys.readouterr().out
+    paths = out.split('Most Common Paths:', 1)[1]
+    assert '  2 × /page2.html' in paths
+    assert '  1 × /api/users' in paths
+    assert ':8765' not in paths
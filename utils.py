@@ -6,14 +6,17 @@
 
 import re
 import time
+import functools
 import random
 import string
 from typing import List, Set, Tuple, Optional, Any
 from urllib.parse import urlparse, urljoin, urlunparse, parse_qs, urlencode
 
+import tldextract
+
 # 导入 colorama
 try:
-    from colorama import init, Fore, Back, Style
+    from colorama import init, Fore as _Fore, Back as _Back, Style as _Style
     init(autoreset=True)
 except ImportError:
     # 如果 colorama 不可用，创建虚拟类
@@ -21,9 +24,9 @@ except ImportError:
         def __getattr__(self, name):
             return ""
     
-    Fore = DummyColor()
-    Back = DummyColor()
-    Style = DummyColor()
+    _Fore = DummyColor()
+    _Back = DummyColor()
+    _Style = DummyColor()
     
     def init(**kwargs):
         pass
@@ -31,10 +34,59 @@ except ImportError:
 # 初始化colorama
 init(autoreset=True)
 
+# 是否输出颜色（--no-color 时关闭）
+_color_enabled = True
+
+
+class _ColorCodes:
+    """颜色代码代理：关闭彩色输出后所有属性都返回空字符串"""
+    
+    def __init__(self, codes):
+        self._codes = codes
+    
+    def __getattr__(self, name):
+        value = getattr(self._codes, name)
+        return value if _color_enabled else ""
+
+
+# 所有模块通过这些代理取颜色代码，set_color_enabled 对直接拼接颜色的输出同样生效
+Fore = _ColorCodes(_Fore)
+Back = _ColorCodes(_Back)
+Style = _ColorCodes(_Style)
+
+@functools.lru_cache(maxsize=65536)
+def get_domain(url: str) -> str:
+    """提取域名"""
+    try:
+        parsed = urlparse(url)
+        return parsed.netloc.lower()
+    except:
+        return ""
+
+
+# 规范化时直接丢弃的伪协议
+_BLACK_RE = re.compile(r'(?:javascript|mailto|tel|data|blob|about):', re.IGNORECASE | re.ASCII)
+
+# 使用内置的公共后缀列表快照，不联网更新（主域名和子域名提取共用）
+TLD_EXTRACT = tldextract.TLDExtract(suffix_list_urls=())
+
+
+@functools.lru_cache(maxsize=65536)
+def get_base_domain(url: str) -> str:
+    """
+    提取主域名（注册域名，如 example.co.uk），按公共后缀列表识别多级后缀
+    :param url: URL或域名（可带端口）
+    :return: 小写的主域名，IP和单标签主机名原样返回（不含端口）
+    """
+    extracted = TLD_EXTRACT(url)
+    return '.'.join(part for part in (extracted.domain, extracted.suffix) if part).lower()
+
+
 class URLNormalizer:
     """URL规范化工具类"""
     
     @staticmethod
+    @functools.lru_cache(maxsize=65536)
     def normalize(url: str, base_url: str = None) -> str:
         """
         规范化URL
@@ -42,15 +94,17 @@ class URLNormalizer:
         :param base_url: 基础URL
         :return: 规范化后的URL
         """
-        if not url or url.strip() == "":
+        if not url:
             return ""
         
         # 去除两端的空白和引号
-        url = url.strip().strip('"').strip("'")
+        url = url.strip()
+        if not url:
+            return ""
+        url = url.strip('"\'')
         
         # 黑名单检查
-        black_keywords = ['javascript:', 'mailto:', 'tel:', 'data:', 'blob:', 'about:']
-        if any(url.lower().startswith(keyword) for keyword in black_keywords):
+        if _BLACK_RE.match(url):
             return ""
         
         # 如果没有 base_url,只处理完整 URL
@@ -92,17 +146,18 @@ class URLNormalizer:
             if not path:
                 path = '/'
             
-            # 移除路径中的./和../
-            path_parts = []
-            for part in path.split('/'):
-                if part == '.':
-                    continue
-                elif part == '..':
-                    if path_parts:
-                        path_parts.pop()
-                else:
-                    path_parts.append(part)
-            path = '/'.join(path_parts)
+            # 移除路径中的./和../（绝大多数路径不含以 '.' 开头的段，直接跳过）
+            if path.startswith('.') or '/.' in path:
+                path_parts = []
+                for part in path.split('/'):
+                    if part == '.':
+                        continue
+                    elif part == '..':
+                        if path_parts:
+                            path_parts.pop()
+                    else:
+                        path_parts.append(part)
+                path = '/'.join(path_parts)
             
             # 保留原始查询参数,不进行过度规范化
             query = parsed.query
@@ -123,29 +178,9 @@ class URLNormalizer:
             # 如果规范化失败,返回空字符串而不是原始URL
             return ""
     
-    @staticmethod
-    def get_domain(url: str) -> str:
-        """提取域名"""
-        try:
-            parsed = urlparse(url)
-            return parsed.netloc.lower()
-        except:
-            return ""
-    
-    @staticmethod
-    def get_base_domain(url: str) -> str:
-        """提取主域名（二级域名）"""
-        domain = URLNormalizer.get_domain(url)
-        if not domain:
-            return ""
-        
-        parts = domain.split('.')
-        if len(parts) > 2:
-            # 处理类似 .co.uk 的特殊情况
-            if domain.endswith('.co.uk') or domain.endswith('.com.cn'):
-                return '.'.join(parts[-3:])
-            return '.'.join(parts[-2:])
-        return domain
+    # 域名提取为模块级缓存函数，这里保留类上的访问方式
+    get_domain = staticmethod(get_domain)
+    get_base_domain = staticmethod(get_base_domain)
     
     @staticmethod
     def is_same_domain(url1: str, url2: str) -> bool:
@@ -155,6 +190,10 @@ class URLNormalizer:
         return domain1 and domain2 and domain1 == domain2
 
 
+# 进度条最短重绘间隔（秒）
+_PROGRESS_REFRESH_INTERVAL = 0.05
+
+
 class ProgressBar:
     """进度条工具类"""
     
@@ -164,6 +203,14 @@ class ProgressBar:
         self.current = 0
         self.start_time = time.time()
         self.bar_length = 40
+        
+        # 预先生成满格和空格字符串，绘制时按进度切片拼接
+        self._full_bar = '█' * self.bar_length
+        self._empty_bar = '░' * self.bar_length
+        
+        # 限制重绘频率：记录上次绘制的时间和进度
+        self._last_draw = 0.0
+        self._drawn = 0
     
     def __enter__(self):
         """上下文管理器入口"""
@@ -177,14 +224,21 @@ class ProgressBar:
     def update(self, n: int = 1):
         """更新进度"""
         self.current += n
+        
+        # 距上次绘制不足间隔时跳过（完成时总是绘制）
+        if self.current < self.total and time.monotonic() - self._last_draw < _PROGRESS_REFRESH_INTERVAL:
+            return
         self._display()
     
     def _display(self):
         """显示进度条"""
+        self._last_draw = time.monotonic()
+        self._drawn = self.current
+        
         percent = self.current / self.total * 100
         filled_length = int(self.bar_length * self.current // self.total)
         
-        bar = '█' * filled_length + '░' * (self.bar_length - filled_length)
+        bar = self._full_bar[:filled_length] + self._empty_bar[filled_length:]
         
         elapsed_time = time.time() - self.start_time
         if self.current > 0:
@@ -197,7 +251,9 @@ class ProgressBar:
         print(f"\r{Fore.CYAN}{self.desc}:{Fore.RESET} |{bar}| {percent:6.2f}% ({self.current}/{self.total}) {time_info}", end="", flush=True)
     
     def close(self):
-        """结束进度条"""
+        """结束进度条（补绘被节流跳过的最终进度）"""
+        if self.current != self._drawn:
+            self._display()
         print()
 
 
@@ -219,8 +275,20 @@ def is_valid_url(url: str) -> bool:
         return False
 
 
+def set_color_enabled(enabled: bool) -> None:
+    """
+    开启或关闭彩色输出
+    :param enabled: 是否启用颜色
+    """
+    global _color_enabled
+    _color_enabled = enabled
+
+
 def print_color(text: str, color: str = Fore.WHITE, style: str = Style.NORMAL) -> None:
     """彩色打印"""
+    if not _color_enabled:
+        print(text)
+        return
     print(f"{style}{color}{text}{Style.RESET_ALL}")
 
 